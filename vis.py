@@ -4,6 +4,7 @@ import pygame.sndarray
 import numpy as np
 import colorsys
 import math
+from functools import lru_cache
 
 # Constants
 WIDTH, HEIGHT = 1000, 800
@@ -16,11 +17,24 @@ LIGHT_BLUE = (173, 216, 230)
 SCALE_COLOR = (100, 255, 100)
 
 NOTES = ['C', 'G', 'D', 'A', 'E', 'B', 'F#/Gb', 'C#/Db', 'G#/Ab', 'D#/Eb', 'A#/Bb', 'F']
-MIDI_TO_CIRCLE = {0: 0, 1: 7, 2: 2, 3: 9, 4: 4, 5: 11, 6: 6, 7: 1, 8: 8, 9: 3, 10: 10, 11: 5}
+# Circle position of each pitch class, indexed by MIDI note % 12
+MIDI_TO_CIRCLE = (0, 7, 2, 9, 4, 11, 6, 1, 8, 3, 10, 5)
 MAJOR_SCALE = [0, 2, 4, 5, 7, 9, 11]
 NATURAL_MINOR_SCALE = [0, 2, 3, 5, 7, 8, 10]
 HARMONIC_MINOR_SCALE = [0, 2, 3, 5, 7, 8, 11]
 PENTATONIC_SCALE = [0, 2, 4, 7, 9]
+SCALE_INTERVALS = {
+    "Major": MAJOR_SCALE,
+    "Natural Minor": NATURAL_MINOR_SCALE,
+    "Harmonic Minor": HARMONIC_MINOR_SCALE,
+    "Pentatonic": PENTATONIC_SCALE,
+}
+# Every (root, scale type) combination, built once so get_scale() is a lookup
+SCALE_TABLE = {
+    (root, scale_type): frozenset((root + interval) % 12 for interval in intervals)
+    for root in range(12) for scale_type, intervals in SCALE_INTERVALS.items()
+}
+EMPTY_SCALE = frozenset()
 
 CHORD_TYPES = {
     (0, 4, 7): "Major",
@@ -39,6 +53,54 @@ CHORD_TYPES = {
     (0, 4, 7, 10, 14, 17): "11th",
     (0, 4, 7, 10, 14, 17, 21): "13th"
 }
+# Chord name, whether it is drawn with the major palette, and whether it is a seventh-type chord.
+# The flags are classified from the name once here instead of on every frame.
+CHORD_INFO = {
+    intervals: (
+        name,
+        any(word in name for word in ("Major", "Augmented", "Dominant")),
+        any(word in name for word in ("7th", "9th", "11th", "13th")),
+    )
+    for intervals, name in CHORD_TYPES.items()
+}
+COMPLEX_CHORD = ("Complex", False, False)
+# Chord types keyed by interval bitmask (bit i set for each interval i) for integer lookups
+CHORD_MASKS = {sum(1 << interval for interval in intervals): info for intervals, info in CHORD_INFO.items()}
+
+# Circle geometry is fixed, so note positions are computed once rather than every frame
+CIRCLE_CENTER = (CIRCLE_WIDTH // 2, CIRCLE_HEIGHT // 2)
+CIRCLE_RADIUS = min(CIRCLE_WIDTH, CIRCLE_HEIGHT) // 2 - 50
+NOTE_POSITIONS = tuple(
+    (CIRCLE_CENTER[0] + CIRCLE_RADIUS * math.cos(angle), CIRCLE_CENTER[1] + CIRCLE_RADIUS * math.sin(angle))
+    for angle in (i * (2 * math.pi / 12) - math.pi / 2 for i in range(12))
+)
+NOTE_RADIUS = 30
+
+# Screen regions that can change between frames, cleared and passed to pygame.display.update()
+NOTE_AREA_RECT = pygame.Rect(0, 0, 2 * (CIRCLE_RADIUS + NOTE_RADIUS + 1), 2 * (CIRCLE_RADIUS + NOTE_RADIUS + 1))
+NOTE_AREA_RECT.center = CIRCLE_CENTER
+SCALE_LABEL_RECT = pygame.Rect(0, CIRCLE_HEIGHT - 50, CIRCLE_WIDTH, 40)
+SIDEBAR_RECT = pygame.Rect(CIRCLE_WIDTH, 0, SIDEBAR_WIDTH, HEIGHT)
+
+@lru_cache(maxsize=None)
+def get_font(size):
+    # Fonts can only be created after pygame.init(), so they are cached on first use
+    return pygame.font.Font(None, size)
+
+@lru_cache(maxsize=512)
+def render_text(text, size, color):
+    # Labels repeat from frame to frame, so reuse the rendered surface instead of rasterizing again
+    return get_font(size).render(text, True, color)
+
+@lru_cache(maxsize=256)
+def render_note(note, color, show_note_name):
+    # Circle and label composited once per (note, color) so a frame is a single blits() call
+    size = 2 * NOTE_RADIUS + 1
+    sprite = pygame.Surface((size, size), pygame.SRCALPHA)
+    pygame.draw.circle(sprite, color, (NOTE_RADIUS, NOTE_RADIUS), NOTE_RADIUS)
+    text = render_text(note if show_note_name else "", 28, BLACK)
+    sprite.blit(text, text.get_rect(center=(NOTE_RADIUS, NOTE_RADIUS)))
+    return sprite
 
 class Button:
     def __init__(self, x, y, width, height, text, color, text_color, toggle=False):
@@ -51,17 +113,39 @@ class Button:
 
     def draw(self, screen):
         pygame.draw.rect(screen, self.color if not self.active else LIGHT_BLUE, self.rect)
-        font = pygame.font.Font(None, 24)
-        text_surface = font.render(self.text, True, self.text_color)
+        text_surface = render_text(self.text, 24, self.text_color)
         text_rect = text_surface.get_rect(center=self.rect.center)
         screen.blit(text_surface, text_rect)
 
     def handle_event(self, event):
-        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-            if self.rect.collidepoint(event.pos):
-                if self.toggle:
-                    self.active = not self.active
-                return True
+        if event.type != pygame.MOUSEBUTTONDOWN or event.button != 1:
+            return False
+        if self.rect.collidepoint(event.pos):
+            if self.toggle:
+                self.active = not self.active
+            return True
+        return False
+
+class RadioGroup:
+    # A column of evenly spaced buttons where exactly one can be active at a time
+    def __init__(self, x, y, width, height, spacing, labels, color, text_color):
+        self.top = y
+        self.spacing = spacing
+        self.buttons = [Button(x, y + i * spacing, width, height, label, color, text_color)
+                        for i, label in enumerate(labels)]
+        self.active_index = None
+
+    def handle_event(self, event):
+        if event.type != pygame.MOUSEBUTTONDOWN or event.button != 1:
+            return False
+        # Buttons are evenly spaced, so the row under the cursor gives the only candidate
+        index = (event.pos[1] - self.top) // self.spacing
+        if 0 <= index < len(self.buttons) and self.buttons[index].rect.collidepoint(event.pos):
+            if self.active_index is not None:
+                self.buttons[self.active_index].active = False
+            self.active_index = index
+            self.buttons[index].active = True
+            return True
         return False
 
 def setup_midi():
@@ -85,104 +169,171 @@ def setup_midi():
 
     return pygame.midi.Input(input_id)
 
-def generate_sine_wave(freq, duration=1.0, volume=0.3):
+def generate_sine_wave(freq, duration=0.1, volume=0.3):
+    # Sounds are played on loop, so each note only needs a short buffer holding a whole
+    # number of cycles. That also keeps the loop point free of clicks.
     sample_rate = 44100
-    t = np.linspace(0, duration, int(duration * sample_rate), False)
-    wave = np.sin(2 * np.pi * freq * t) * volume
-    stereo_wave = np.column_stack((wave, wave))
-    return (stereo_wave * 32767).astype(np.int16)
-
-def generate_note_sounds():
-    note_sounds = {}
-    for midi_note in range(128):
-        freq = 440 * (2 ** ((midi_note - 69) / 12))
-        sound_array = generate_sine_wave(freq)
-        note_sounds[midi_note] = pygame.sndarray.make_sound(sound_array)
-    return note_sounds
-
-def note_to_color(note, is_major=True, is_seventh=False):
+    cycles = max(1, round(freq * duration))
+    length = round(cycles * sample_rate / freq)
+    # Computed in place in a single work buffer rather than allocating a temporary per step
+    work = np.arange(length) * (2 * np.pi * cycles / length)
+    np.sin(work, out=work)
+    np.multiply(work, volume * 32767, out=work)
+    # Both channels are identical, so write the samples straight into a stereo array
+    stereo_wave = np.empty((length, 2), dtype=np.int16)
+    stereo_wave[:, 0] = work
+    stereo_wave[:, 1] = stereo_wave[:, 0]
+    return stereo_wave
+
+@lru_cache(maxsize=128)
+def get_note_sound(midi_note):
+    # Synthesized on first use, so only notes that are actually played take up memory
+    freq = 440 * (2 ** ((midi_note - 69) / 12))
+    return pygame.sndarray.make_sound(generate_sine_wave(freq))
+
+def compute_note_color(note, is_major, is_seventh):
     hue = (note * 30) % 360 / 360.0
     saturation = 0.7 if is_major else 0.5
     value = 0.9 if not is_seventh else 0.7
     r, g, b = colorsys.hsv_to_rgb(hue, saturation, value)
     return (int(r * 255), int(g * 255), int(b * 255))
 
-def recognize_chord(pressed_notes):
+# Only 12 x 2 x 2 colors are possible, so build them all up front
+NOTE_COLORS = {
+    (note, is_major, is_seventh): compute_note_color(note, is_major, is_seventh)
+    for note in range(12) for is_major in (False, True) for is_seventh in (False, True)
+}
+
+def note_to_color(note, is_major=True, is_seventh=False):
+    return NOTE_COLORS[(note % 12, bool(is_major), bool(is_seventh))]
+
+def build_chord_lookup():
+    # The result only depends on the root's pitch class and the pitch class mask, so every
+    # answer is computed here once. Entries sharing a root and chord reuse the same tuple.
+    lookup = [None] * (12 << 12)
+    for root in range(12):
+        root_name = NOTES[MIDI_TO_CIRCLE[root]]
+        results = {}
+        for pitch_class_mask in range(1 << 12):
+            # Rotating the pitch class mask so the root lands on bit 0 gives the interval mask
+            interval_mask = ((pitch_class_mask >> root) | (pitch_class_mask << (12 - root))) & 0xFFF
+            chord_type, is_major, is_seventh = CHORD_MASKS.get(interval_mask, COMPLEX_CHORD)
+            if chord_type not in results:
+                results[chord_type] = (f"{root_name} {chord_type}", root, is_major, is_seventh)
+            lookup[(root << 12) | pitch_class_mask] = results[chord_type]
+    return lookup
+
+# Indexed by (root pitch class << 12) | pitch class mask
+CHORD_LOOKUP = build_chord_lookup()
+
+def recognize_chord(pressed_notes, pitch_class_mask):
     if len(pressed_notes) < 3:
         return None
     
-    root = min(pressed_notes)
-    intervals = tuple(sorted((note - root) % 12 for note in pressed_notes))
-    
-    chord_type = CHORD_TYPES.get(intervals, "Complex")
-    root_name = NOTES[MIDI_TO_CIRCLE[root % 12]]
-    return f"{root_name} {chord_type}", root % 12, chord_type
+    # Doubled pitch classes share a bit, but a chord only matches when every note is distinct.
+    # An empty mask never names a chord, so it looks up as Complex.
+    if bin(pitch_class_mask).count("1") != len(pressed_notes):
+        pitch_class_mask = 0
+    return CHORD_LOOKUP[((min(pressed_notes) % 12) << 12) | pitch_class_mask]
 
 def get_scale(root, scale_type):
-    if scale_type == "Major":
-        return [(root + interval) % 12 for interval in MAJOR_SCALE]
-    elif scale_type == "Natural Minor":
-        return [(root + interval) % 12 for interval in NATURAL_MINOR_SCALE]
-    elif scale_type == "Harmonic Minor":
-        return [(root + interval) % 12 for interval in HARMONIC_MINOR_SCALE]
-    elif scale_type == "Pentatonic":
-        return [(root + interval) % 12 for interval in PENTATONIC_SCALE]
-    return []
-
-def draw_circle_of_fifths(screen, pressed_notes, chord_info, scale_root, scale_type, show_note_names):
-    screen.fill(BLACK)
-    center = (CIRCLE_WIDTH // 2, CIRCLE_HEIGHT // 2)
-    radius = min(CIRCLE_WIDTH, CIRCLE_HEIGHT) // 2 - 50
+    return SCALE_TABLE.get((root, scale_type), EMPTY_SCALE)
+
+def draw_circle_of_fifths(screen, pressed_pc_mask, chord_info, scale_root, scale_type, show_note_names):
+    # Nothing is drawn outside these regions, so only they need clearing
+    screen.fill(BLACK, NOTE_AREA_RECT)
+    screen.fill(BLACK, SCALE_LABEL_RECT)
 
     if chord_info:
-        chord_name, root_note, chord_type = chord_info
-        is_major = "Major" in chord_type or "Augmented" in chord_type or "Dominant" in chord_type
-        is_seventh = "7th" in chord_type or "9th" in chord_type or "11th" in chord_type or "13th" in chord_type
+        chord_name, root_note, is_major, is_seventh = chord_info
         highlight_color = note_to_color(root_note, is_major, is_seventh)
         line_color = highlight_color
     else:
         highlight_color = WHITE
         line_color = WHITE
 
-    scale_notes = get_scale(scale_root, scale_type) if scale_root is not None else []
+    scale_notes = get_scale(scale_root, scale_type) if scale_root is not None else EMPTY_SCALE
+    circle_mask = 0  # Same notes as pressed_pc_mask, with bits in circle order
+    for pitch_class in range(12):
+        if pressed_pc_mask & (1 << pitch_class):
+            circle_mask |= 1 << MIDI_TO_CIRCLE[pitch_class]
     pressed_positions = []
+    note_sprites = []
 
     for i, note in enumerate(NOTES):
-        angle = i * (2 * math.pi / 12) - math.pi / 2
-        x = center[0] + radius * math.cos(angle)
-        y = center[1] + radius * math.sin(angle)
-        
-        color = highlight_color if note in pressed_notes else SCALE_COLOR if i in scale_notes else GRAY
-        pygame.draw.circle(screen, color, (int(x), int(y)), 30)
-        
-        font = pygame.font.Font(None, 28)
-        text = font.render(note if show_note_names else "", True, BLACK)
-        text_rect = text.get_rect(center=(int(x), int(y)))
-        screen.blit(text, text_rect)
+        x, y = NOTE_POSITIONS[i]
 
-        if note in pressed_notes:
+        is_pressed = circle_mask & (1 << i)
+        color = highlight_color if is_pressed else SCALE_COLOR if i in scale_notes else GRAY
+        sprite = render_note(note, color, show_note_names)
+        note_sprites.append((sprite, sprite.get_rect(center=(int(x), int(y)))))
+
+        if is_pressed:
             pressed_positions.append((x, y))
 
+    screen.blits(note_sprites, doreturn=False)
+
     if len(pressed_positions) > 1:
         pygame.draw.lines(screen, line_color, True, pressed_positions, 2)
 
     if chord_info:
-        font = pygame.font.Font(None, 36)
-        text = font.render(chord_info[0], True, WHITE)
-        text_rect = text.get_rect(center=(CIRCLE_WIDTH // 2, CIRCLE_HEIGHT // 2))
+        text = render_text(chord_info[0], 36, WHITE)
+        text_rect = text.get_rect(center=CIRCLE_CENTER)
         screen.blit(text, text_rect)
 
     if scale_root is not None:
         scale_name = f"{NOTES[MIDI_TO_CIRCLE[scale_root]]} {scale_type} Scale"
-        font = pygame.font.Font(None, 30)
-        text = font.render(scale_name, True, SCALE_COLOR)
-        text_rect = text.get_rect(center=(CIRCLE_WIDTH // 2, CIRCLE_HEIGHT - 30))
+        text = render_text(scale_name, 30, SCALE_COLOR)
+        text_rect = text.get_rect(center=SCALE_LABEL_RECT.center)
         screen.blit(text, text_rect)
 
+    return [NOTE_AREA_RECT, SCALE_LABEL_RECT]
+
 def draw_sidebar(screen, buttons):
-    pygame.draw.rect(screen, GRAY, (CIRCLE_WIDTH, 0, SIDEBAR_WIDTH, HEIGHT))
+    pygame.draw.rect(screen, GRAY, SIDEBAR_RECT)
     for button in buttons:
         button.draw(screen)
+    return [SIDEBAR_RECT]
+
+def handle_midi_events(midi_input, active_sounds, pressed_midi_notes, pressed_pc_mask, scale_root):
+    changed = False
+    # Drain everything that has queued up, not just one batch, so fast playing never lags behind
+    while midi_input.poll():
+        midi_events = midi_input.read(32)
+        if not midi_events:
+            break
+        for event in midi_events:
+            status = event[0][0] & 0xF0
+            note = event[0][1]
+            velocity = event[0][2]
+            
+            if status == 0x90 and velocity > 0:  # Note On
+                changed = True
+                pressed_midi_notes.add(note)
+                pressed_pc_mask |= 1 << (note % 12)
+                note_index = MIDI_TO_CIRCLE[note % 12]
+                note_name = NOTES[note_index]
+                if note not in active_sounds:
+                    sound = get_note_sound(note)
+                    sound.play(-1)  # Play indefinitely
+                    active_sounds[note] = sound
+                print(f"Note On: MIDI {note}, Mapped to {note_name}")
+                if len(pressed_midi_notes) == 1:
+                    scale_root = note % 12
+            elif status == 0x80 or (status == 0x90 and velocity == 0):  # Note Off
+                changed = True
+                pressed_midi_notes.discard(note)
+                if all(n % 12 != note % 12 for n in pressed_midi_notes):
+                    pressed_pc_mask &= ~(1 << (note % 12))
+                note_index = MIDI_TO_CIRCLE[note % 12]
+                note_name = NOTES[note_index]
+                if note in active_sounds:
+                    active_sounds[note].stop()
+                    del active_sounds[note]
+                print(f"Note Off: MIDI {note}, Mapped to {note_name}")
+                if len(pressed_midi_notes) == 0:
+                    scale_root = None
+    return pressed_pc_mask, scale_root, changed
 
 def main():
     pygame.init()
@@ -190,26 +341,24 @@ def main():
     pygame.display.set_caption("Circle of Fifths MIDI Visualizer")
 
     midi_input = setup_midi()
-    pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=2**12)
-    note_sounds = generate_note_sounds()
-
-    buttons = [
-        Button(CIRCLE_WIDTH + 10, 50, 180, 40, "Toggle Scale Highlight", WHITE, BLACK, toggle=True),
-        Button(CIRCLE_WIDTH + 10, 100, 180, 40, "Toggle Note Names", WHITE, BLACK, toggle=True),
-        Button(CIRCLE_WIDTH + 10, 150, 180, 40, "Major Scale", WHITE, BLACK, toggle=True),
-        Button(CIRCLE_WIDTH + 10, 200, 180, 40, "Natural Minor Scale", WHITE, BLACK, toggle=True),
-        Button(CIRCLE_WIDTH + 10, 250, 180, 40, "Harmonic Minor Scale", WHITE, BLACK, toggle=True),
-        Button(CIRCLE_WIDTH + 10, 300, 180, 40, "Pentatonic Scale", WHITE, BLACK, toggle=True),
-    ]
+    pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=2**10)
+
+    scale_highlight_button = Button(CIRCLE_WIDTH + 10, 50, 180, 40, "Toggle Scale Highlight", WHITE, BLACK, toggle=True)
+    note_names_button = Button(CIRCLE_WIDTH + 10, 100, 180, 40, "Toggle Note Names", WHITE, BLACK, toggle=True)
+    scale_types = list(SCALE_INTERVALS)
+    scale_buttons = RadioGroup(CIRCLE_WIDTH + 10, 150, 180, 40, 50,
+                               [f"{scale_type} Scale" for scale_type in scale_types], WHITE, BLACK)
+    buttons = [scale_highlight_button, note_names_button] + scale_buttons.buttons
 
     running = True
     pressed_midi_notes = set()
-    pressed_circle_notes = set()
+    pressed_pc_mask = 0  # Bit n set while any note of pitch class n is held
     active_sounds = {}
     scale_root = None
     scale_type = "Major"
     show_scale = False
     show_note_names = False
+    dirty = True  # Redraw only when a MIDI event, button click or window event changed something
 
     print("Visualizer is running. Play notes on your MIDI device to see and hear them.")
     print("Close the window to exit.")
@@ -218,54 +367,33 @@ def main():
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
-            for button in buttons:
-                if button.handle_event(event):
-                    if button.text == "Toggle Scale Highlight":
-                        show_scale = button.active
-                    elif button.text == "Toggle Note Names":
-                        show_note_names = button.active
-                    elif "Scale" in button.text:
-                        scale_type = button.text.replace(" Scale", "")
-                        for b in buttons[2:]:
-                            if b != button:
-                                b.active = False
-
-        if midi_input.poll():
-            midi_events = midi_input.read(10)
-            for event in midi_events:
-                status = event[0][0] & 0xF0
-                note = event[0][1]
-                velocity = event[0][2]
-                
-                if status == 0x90 and velocity > 0:  # Note On
-                    pressed_midi_notes.add(note)
-                    note_index = MIDI_TO_CIRCLE[note % 12]
-                    note_name = NOTES[note_index]
-                    pressed_circle_notes.add(note_name)
-                    if note not in active_sounds:
-                        note_sounds[note].play(-1)  # Play indefinitely
-                        active_sounds[note] = note_sounds[note]
-                    print(f"Note On: MIDI {note}, Mapped to {note_name}")
-                    if len(pressed_midi_notes) == 1:
-                        scale_root = note % 12
-                elif status == 0x80 or (status == 0x90 and velocity == 0):  # Note Off
-                    pressed_midi_notes.discard(note)
-                    note_index = MIDI_TO_CIRCLE[note % 12]
-                    note_name = NOTES[note_index]
-                    pressed_circle_notes.discard(note_name)
-                    if note in active_sounds:
-                        active_sounds[note].stop()
-                        del active_sounds[note]
-                    print(f"Note Off: MIDI {note}, Mapped to {note_name}")
-                    if len(pressed_midi_notes) == 0:
-                        scale_root = None
-
-        chord_info = recognize_chord(pressed_midi_notes)
-        draw_circle_of_fifths(screen, pressed_circle_notes, chord_info, 
-                              scale_root if show_scale else None, 
-                              scale_type, show_note_names)
-        draw_sidebar(screen, buttons)
-        pygame.display.flip()
+            elif event.type == pygame.VIDEOEXPOSE:
+                dirty = True
+            elif scale_highlight_button.handle_event(event):
+                dirty = True
+                show_scale = scale_highlight_button.active
+            elif note_names_button.handle_event(event):
+                dirty = True
+                show_note_names = note_names_button.active
+            elif scale_buttons.handle_event(event):
+                dirty = True
+                scale_type = scale_types[scale_buttons.active_index]
+
+        pressed_pc_mask, scale_root, midi_changed = handle_midi_events(
+            midi_input, active_sounds, pressed_midi_notes, pressed_pc_mask, scale_root)
+        dirty = dirty or midi_changed
+
+        if not dirty:
+            pygame.time.wait(1)
+            continue
+
+        chord_info = recognize_chord(pressed_midi_notes, pressed_pc_mask)
+        changed_rects = draw_circle_of_fifths(screen, pressed_pc_mask, chord_info,
+                                              scale_root if show_scale else None,
+                                              scale_type, show_note_names)
+        changed_rects += draw_sidebar(screen, buttons)
+        pygame.display.update(changed_rects)
+        dirty = False
 
     # Cleanup
     for sound in active_sounds.values():